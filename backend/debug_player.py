@@ -1,7 +1,15 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
 import re
 from datetime import datetime
+from urllib.parse import urljoin
+
+# Shared keep-alive session so page searches reuse one connection
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": "ttcan-rating-scraper/1.0", "Accept-Encoding": "gzip, deflate"})
+SESSION.mount("http://", HTTPAdapter(max_retries=Retry(total=3, backoff_factor=0.5)))
 
 def debug_player_page(player_name=None):
     if player_name is None:
@@ -24,49 +32,43 @@ def debug_player_page(player_name=None):
     # Search through pages to find the player
     for page in range(1, 50):  # Search first 50 pages
         params["Formv_ctta_ratings_Page"] = page
-        resp = requests.get(base_url, params=params, timeout=30)
-        soup = BeautifulSoup(resp.content, "html.parser")
-        table = soup.find("table", class_="resultTable")
+        resp = SESSION.get(base_url, params=params, timeout=30)
+        doc = lxml.html.fromstring(resp.content)
+        rows = doc.xpath("(//table[contains(@class, 'resultTable')])[1]//tr")
         
-        if not table:
+        if not rows:
             break
             
-        rows = table.find_all("tr")
         for row in rows[1:]:  # Skip header
-            cols = row.find_all("td")
+            cols = row.xpath("./td")
             if len(cols) >= 7:
-                name = cols[1].get_text(strip=True)
+                name = cols[1].text_content().strip()
                 if player_name.upper() in name.upper():
                     print(f"Found target player: {name}")
-                    link_tag = cols[1].find("a")
-                    if link_tag and link_tag.get("href"):
-                        player_link = link_tag.get("href")
+                    hrefs = cols[1].xpath(".//a/@href")
+                    if hrefs:
+                        player_link = hrefs[0]
                         print(f"Found {name} with link: {player_link}")
                         
                         # Now fetch the player's page
-                        if player_link.startswith('/'):
-                            full_url = f"http://www.ttcan.ca{player_link}"
-                        elif player_link.startswith('http'):
-                            full_url = player_link
-                        else:
-                            full_url = f"http://www.ttcan.ca/ratingSystem/{player_link}"
+                        full_url = urljoin("http://www.ttcan.ca/ratingSystem/", player_link)
                         
                         print(f"Fetching: {full_url}")
-                        player_resp = requests.get(full_url, timeout=15)
-                        player_soup = BeautifulSoup(player_resp.content, "html.parser")
+                        player_resp = SESSION.get(full_url, timeout=15)
+                        player_doc = lxml.html.fromstring(player_resp.content)
                         
                         # Print all tables and their structure
-                        tables = player_soup.find_all("table")
+                        tables = player_doc.xpath("//table")
                         print(f"Found {len(tables)} tables on the page")
                         
                         for i, table in enumerate(tables):
                             print(f"\n=== TABLE {i+1} ===")
-                            rows = table.find_all("tr")
+                            rows = table.xpath(".//tr")
                             print(f"Table has {len(rows)} rows")
                             
                             for j, row in enumerate(rows[:5]):  # Show first 5 rows
-                                cols = row.find_all(["td", "th"])
-                                col_texts = [col.get_text(strip=True) for col in cols]
+                                cols = row.xpath(".//td|.//th")
+                                col_texts = [col.text_content().strip() for col in cols]
                                 print(f"Row {j+1} ({len(cols)} cols): {col_texts}")
                         
                         return
@@ -1,18 +1,30 @@
 import requests
-from bs4 import BeautifulSoup
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.etree
+import lxml.html
 import gspread
+from gspread.utils import rowcol_to_a1
 from google.oauth2.service_account import Credentials
 import time
 import logging
 import sys
 import os
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
+from urllib.parse import urljoin
 from dotenv import load_dotenv
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple
 import concurrent.futures
+import functools
+import gzip
+import io
+import itertools
 from threading import Lock
 import json
+import orjson
+from operator import itemgetter
 import tempfile
 
 # Load environment variables
@@ -42,16 +54,23 @@ class ScraperConfig:
     # Scraping constants
     MAX_RETRIES = 3
     REQUEST_TIMEOUT = 30
-    PAGE_DELAY = 0.2
-    CONCURRENT_WORKERS = 20
+    PAGE_PREFETCH = 8  # Listing pages fetched concurrently ahead of processing
+    CONCURRENT_WORKERS = 50  # Detail-page fetches in flight; lxml parses without holding the GIL
     HISTORY_CUTOFF_YEAR = 2010
+    CHECKPOINT_TTL_HOURS = 24  # Older sessions are not resumed; the rating period has likely moved on
+    HTTP_CACHE_EXPIRE_SECONDS = 86400  # Fetched pages are reused for a day across runs
+    # Sustained request rate to the site across all threads. Defaults to one request per
+    # worker per second: at typical sub-second page latency every worker stays busy and
+    # the bucket only clips bursts; set REQUESTS_PER_SECOND lower to be gentler on the site.
+    REQUESTS_PER_SECOND = float(os.getenv("REQUESTS_PER_SECOND", CONCURRENT_WORKERS))
+    REQUEST_BURST = CONCURRENT_WORKERS + PAGE_PREFETCH  # One request per pooled connection after an idle spell
     
     # Google Sheets constants
-    BATCH_SIZE = 5000  # Very large batch size for maximum upload efficiency
-    BATCH_DELAY = 2    # Increased delay between batches to respect rate limits
+    UPLOAD_MAX_BYTES = 1_500_000  # JSON size of the rows in one batch update, under the 2 MB payload guideline
+    UPLOAD_CONCURRENCY = 4  # Batch updates in flight
+    SHEETS_WRITES_PER_MINUTE = 280  # Paced just under the 300 writes/minute per-project quota
 
 class ScraperValidation:
-    REQUIRED_FIELDS = ["Name", "Province", "Rating", "Period", "Last Played"]
     MIN_COLUMNS_FOR_RATING_DATA = 5
     MIN_DATE_LENGTH = 5
     MAX_RATING = 5000
@@ -80,22 +99,25 @@ def initialize_google_sheets() -> gspread.Worksheet:
 # Initialize sheets connection
 sheet, gc = initialize_google_sheets()
 
+@functools.lru_cache(maxsize=None)
+def get_worksheet(title: str) -> gspread.Worksheet:
+    """Return a worksheet of the target spreadsheet, looked up once per process."""
+    return sheet.spreadsheet.worksheet(title)
+
 # ==== DATA VALIDATION ====
-def validate_player_data(player: Dict[str, str]) -> bool:
-    """Validate that player data contains all required fields."""
-    for field in ScraperValidation.REQUIRED_FIELDS:
-        if field not in player or not player[field].strip():
-            return False
-    
-    if "Gender" not in player:
-        return False
-    
-    try:
-        int(player["Rating"])
-    except ValueError:
+# Bound once at import; the validators below run for every listing and history row
+MIN_COLUMNS_FOR_RATING_DATA = ScraperValidation.MIN_COLUMNS_FOR_RATING_DATA
+MIN_DATE_LENGTH = ScraperValidation.MIN_DATE_LENGTH
+MAX_RATING = ScraperValidation.MAX_RATING
+HISTORY_CUTOFF_YEAR = ScraperConfig.HISTORY_CUTOFF_YEAR
+
+def validate_player_fields(name: str, province: str, rating: str, period: str, last_played: str) -> bool:
+    """Validate stripped listing cell values before a player record is built."""
+    # Pagination/footer rows fail the rating check, so it goes first
+    if not rating.isdigit():
         return False
     
-    return True
+    return bool(name and province and period and last_played)
 
 def is_valid_rating_entry(period_id: str, period_date: str, rating: str) -> bool:
     """Check if a rating entry is valid based on our criteria."""
@@ -105,116 +127,122 @@ def is_valid_rating_entry(period_id: str, period_date: str, rating: str) -> bool
     if not (period_id and period_id.isdigit()):
         return False
     
-    if not (period_date and len(period_date) > ScraperValidation.MIN_DATE_LENGTH):
+    if not (period_date and len(period_date) > MIN_DATE_LENGTH):
         return False
     
     # Check if rating is within reasonable range
-    rating_val = int(rating)
-    if rating_val >= ScraperValidation.MAX_RATING:
-        return False
-    
-    return True
+    return int(rating) < MAX_RATING
 
 def is_after_cutoff_year(period_date: str) -> bool:
     """Check if the period date is after the cutoff year."""
-    try:
-        # Parse year from period_date (assuming format like "April 5, 2022")
-        year = int(period_date.split(', ')[-1])
-        return year > ScraperConfig.HISTORY_CUTOFF_YEAR
-    except (ValueError, IndexError):
-        return False
+    # The year is the last four characters of period_date (format like "April 5, 2022")
+    year = period_date[-4:]
+    return year.isdigit() and int(year) > HISTORY_CUTOFF_YEAR
 
 # ==== AGE EXTRACTION ====
+# All supported age labels in one alternation so the page text is scanned once
+AGE_PATTERN = re.compile(
+    r"Age:\s*(?P<age>\d+)"
+    r"|(?:DOB|Date of Birth):\s*(?P<dob>\d{4}-\d{2}-\d{2})"
+    r"|(?:Born|Year of Birth):\s*(?P<yob>\d{4})",
+    re.IGNORECASE,
+)
+
 def extract_age_from_text(page_text: str) -> Optional[str]:
-    """Extract age from page text using various patterns."""
-    age_patterns = [
-        r"Age:\s*(\d+)",
-        r"DOB:\s*(\d{4}-\d{2}-\d{2})",
-        r"Date of Birth:\s*(\d{4}-\d{2}-\d{2})",
-        r"Born:\s*(\d{4})",
-        r"Year of Birth:\s*(\d{4})",
-    ]
-    
-    for pattern in age_patterns:
-        match = re.search(pattern, page_text, re.IGNORECASE)
-        if match:
-            age_info = match.group(1)
-            
-            # Handle year of birth (4 digits)
-            if len(age_info) == 4 and age_info.isdigit():
-                birth_year = int(age_info)
-                current_year = datetime.now().year
-                return str(current_year - birth_year)
-            
-            # Handle full date of birth
-            if '-' in age_info and len(age_info) == 10:
-                try:
-                    birth_date = datetime.strptime(age_info, '%Y-%m-%d')
-                    current_date = datetime.now()
-                    calculated_age = current_date.year - birth_date.year
-                    if (current_date.month < birth_date.month or 
-                        (current_date.month == birth_date.month and current_date.day < birth_date.day)):
-                        calculated_age -= 1
-                    return str(calculated_age)
-                except ValueError:
-                    continue
-            
-            # Handle direct age
-            if age_info.isdigit():
-                return age_info
+    """Extract age from page text using the combined age pattern."""
+    for match in AGE_PATTERN.finditer(page_text):
+        # Handle full date of birth
+        if match.group("dob"):
+            try:
+                birth_date = datetime.strptime(match.group("dob"), '%Y-%m-%d')
+            except ValueError:
+                continue
+            current_date = datetime.now()
+            calculated_age = current_date.year - birth_date.year
+            if (current_date.month < birth_date.month or 
+                (current_date.month == birth_date.month and current_date.day < birth_date.day)):
+                calculated_age -= 1
+            return str(calculated_age)
+        
+        age_info = match.group("age") or match.group("yob")
+        
+        # Handle year of birth (4 digits)
+        if len(age_info) == 4:
+            return str(datetime.now().year - int(age_info))
+        
+        # Handle direct age
+        return age_info
     
     return None
 
-def extract_age_from_tables(soup: BeautifulSoup) -> Optional[str]:
+# Value cell following any label cell that mentions age, DOB or birth
+AGE_TABLE_XPATH = lxml.etree.XPath(
+    "//tr/*[self::td or self::th][re:test(., 'age|dob|date of birth|born', 'i')]"
+    "/following-sibling::*[self::td or self::th][1]",
+    namespaces={"re": "http://exslt.org/regular-expressions"},
+)
+
+def extract_age_from_tables(doc: lxml.html.HtmlElement) -> Optional[str]:
     """Extract age from table structures."""
-    tables = soup.find_all("table")
-    for table in tables:
-        rows = table.find_all("tr")
-        for row in rows:
-            cells = row.find_all(["td", "th"])
-            for i, cell in enumerate(cells):
-                cell_text = cell.get_text(strip=True).lower()
-                if any(keyword in cell_text for keyword in ["age", "dob", "date of birth", "born"]):
-                    if i + 1 < len(cells):
-                        next_cell = cells[i + 1].get_text(strip=True)
-                        if next_cell.isdigit():
-                            return next_cell
+    for value_cell in AGE_TABLE_XPATH(doc):
+        value = value_cell.text_content().strip()
+        if value.isdigit():
+            return value
     return None
 
-def extract_player_age(soup: BeautifulSoup) -> Optional[str]:
-    """Extract player age from the soup object."""
+def extract_player_age(doc: lxml.html.HtmlElement) -> Optional[str]:
+    """Extract player age from the parsed player page."""
+    page_text = doc.text_content()
+    
     # Try text patterns first
-    page_text = soup.get_text()
     age = extract_age_from_text(page_text)
     
     # If not found, try table structures
     if not age:
-        age = extract_age_from_tables(soup)
+        age = extract_age_from_tables(doc)
     
     return age
 
+def extract_age_from_response(response: requests.Response,
+                               doc: Optional[lxml.html.HtmlElement] = None) -> Optional[str]:
+    """Extract player age from a page response, building an lxml tree only if needed."""
+    # Labels and values normally share a text node, so the raw HTML usually suffices
+    age = extract_age_from_text(response.text)
+    if not age:
+        if doc is None:
+            doc = lxml.html.fromstring(response.content)
+        age = extract_player_age(doc)
+    return age
+
 # ==== RATING HISTORY EXTRACTION ====
-def extract_rating_history_from_table(table, player_name: str) -> List[Dict[str, str]]:
-    """Extract rating history from a single table."""
+# Data rows of the table headed [Period ID, Period, Prov, Gender, Rating]
+HISTORY_ROWS_XPATH = lxml.etree.XPath(
+    "(//tr[*[1][normalize-space()='Period ID']])[1]/following-sibling::tr"
+)
+ROW_CELLS_XPATH = lxml.etree.XPath("td|th")
+
+def extract_player_rating_history(doc: lxml.html.HtmlElement, player_name: str,
+                                  gender: str = "", province: str = "") -> List[Dict[str, str]]:
+    """Extract player rating history from the parsed player page, tagged with the player's gender and province.
+
+    Only the rows under the history table's header are visited; if that header is
+    missing, every row on the page is tried once in document order instead.
+    """
     history = []
-    rows = table.find_all("tr")
-    
-    if len(rows) < 2:  # Need at least header + 1 data row
-        return history
     
+    rows = HISTORY_ROWS_XPATH(doc) or doc.iter("tr")
     for row in rows:
-        cols = row.find_all(["td", "th"])
-        if len(cols) < ScraperValidation.MIN_COLUMNS_FOR_RATING_DATA:
+        # Child count bounds the cell count, so short rows skip the XPath call
+        if len(row) < MIN_COLUMNS_FOR_RATING_DATA:
+            continue
+        cols = ROW_CELLS_XPATH(row)
+        if len(cols) < MIN_COLUMNS_FOR_RATING_DATA:
             continue
-            
-        col_texts = [col.get_text(strip=True) for col in cols]
         
         # Look for proper rating data structure: [Period_ID, Period_Date, Province, Gender, Rating]
-        period_id = col_texts[0]
-        period_date = col_texts[1]
-        province = col_texts[2]
-        gender = col_texts[3]
-        rating = col_texts[4]
+        period_id = cols[0].text_content().strip()
+        period_date = cols[1].text_content().strip()
+        rating = cols[4].text_content().strip()
         
         if (is_valid_rating_entry(period_id, period_date, rating) and 
             is_after_cutoff_year(period_date)):
@@ -223,50 +251,100 @@ def extract_rating_history_from_table(table, player_name: str) -> List[Dict[str,
                 "PlayerName": player_name,
                 "Period": period_date,
                 "Rating": rating,
-                "LastPlayed": period_date
+                "LastPlayed": period_date,
+                "Gender": gender,
+                "Province": province
             })
     
     return history
 
-def extract_player_rating_history(soup: BeautifulSoup, player_name: str) -> List[Dict[str, str]]:
-    """Extract player rating history from the soup object."""
-    all_history = []
-    tables = soup.find_all("table")
+# ==== HTTP REQUESTS ====
+class TokenBucket:
+    """Thread-safe token bucket: allows bursts up to capacity, refilling at rate tokens per second."""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = Lock()
+    
+    def acquire(self) -> None:
+        """Take one token, sleeping only while the bucket is empty."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+# Every scraper request goes to the same site, so listing and player pages share one budget
+REQUEST_BUCKET = TokenBucket(ScraperConfig.REQUESTS_PER_SECOND, ScraperConfig.REQUEST_BURST)
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a REQUEST_BUCKET token per request actually sent to the site.
     
-    for table in tables:
-        table_history = extract_rating_history_from_table(table, player_name)
-        all_history.extend(table_history)
+    Responses served from the HTTP cache never reach the adapter, so cached re-runs are not throttled.
+    """
     
-    return all_history
+    def send(self, request, **kwargs):
+        REQUEST_BUCKET.acquire()
+        return super().send(request, **kwargs)
+
+def create_http_session() -> requests.Session:
+    """Create a pooled keep-alive session with an on-disk page cache, shared by all scraping requests."""
+    # Only complete pages are stored
+    session = requests_cache.CachedSession(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "ttcan_http_cache"),
+        backend="sqlite",
+        expire_after=ScraperConfig.HTTP_CACHE_EXPIRE_SECONDS,
+        allowable_codes=(200,),
+    )
+    session.headers.update({
+        "User-Agent": "ttcan-rating-scraper/1.0",
+        "Accept-Encoding": "gzip, deflate",
+    })
+    retry = Retry(
+        total=ScraperConfig.MAX_RETRIES,
+        backoff_factor=0.5,
+        backoff_jitter=0.5,  # Desynchronise retries across worker threads
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+    )
+    adapter = RateLimitedAdapter(
+        pool_connections=4,
+        pool_maxsize=ScraperConfig.CONCURRENT_WORKERS + ScraperConfig.PAGE_PREFETCH,
+        pool_block=True,  # Hard cap on in-flight requests to the site instead of fixed sleeps
+        max_retries=retry,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+SESSION = create_http_session()
+PLAYER_BASE_URL = "http://www.ttcan.ca/ratingSystem/"
 
-# ==== HTTP REQUESTS ====
 def make_request_with_retries(url: str, params: Dict = None, timeout: int = None) -> requests.Response:
-    """Make HTTP request with retry logic."""
+    """Make HTTP request through the shared session (retries are handled by its adapter)."""
     if timeout is None:
         timeout = ScraperConfig.REQUEST_TIMEOUT
     
-    for attempt in range(ScraperConfig.MAX_RETRIES):
-        try:
-            response = requests.get(url, params=params, timeout=timeout)
-            response.raise_for_status()
-            return response
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Request failed (attempt {attempt + 1}/{ScraperConfig.MAX_RETRIES}): {e}")
-            if attempt == ScraperConfig.MAX_RETRIES - 1:
-                raise
-            time.sleep(2 ** attempt)
+    response = SESSION.get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response
 
 def build_player_url(player_link: str) -> str:
-    """Build full player URL from link."""
-    if player_link.startswith('/'):
-        return f"http://www.ttcan.ca{player_link}"
-    elif player_link.startswith('http'):
-        return player_link
-    else:
-        return f"http://www.ttcan.ca/ratingSystem/{player_link}"
+    """Build full player URL from an absolute, root-relative or page-relative link."""
+    return urljoin(PLAYER_BASE_URL, player_link)
 
 # ==== MAIN SCRAPING FUNCTIONS ====
-def fetch_player_page_data(player_link: str, player_name: str, fetch_history: bool = False) -> Tuple[Optional[str], List[Dict[str, str]]]:
+def fetch_player_page_data(player_link: str, player_name: str, fetch_history: bool = False,
+                           gender: str = "", province: str = "") -> Tuple[Optional[str], List[Dict[str, str]]]:
     """Fetch both age and rating history from a single page visit."""
     age = None
     rating_history = []
@@ -276,15 +354,15 @@ def fetch_player_page_data(player_link: str, player_name: str, fetch_history: bo
     
     try:
         full_url = build_player_url(player_link)
+        # The whole page is fetched in both modes: the age label may sit anywhere in it,
+        # and the cached response then also serves a later run in the other mode
         response = make_request_with_retries(full_url, timeout=15)
-        soup = BeautifulSoup(response.content, "html.parser")
-        
-        # Extract age
-        age = extract_player_age(soup)
-        
-        # Extract rating history if requested
         if fetch_history:
-            rating_history = extract_player_rating_history(soup, player_name)
+            doc = lxml.html.fromstring(response.content)
+            age = extract_age_from_response(response, doc)
+            rating_history = extract_player_rating_history(doc, player_name, gender, province)
+        else:
+            age = extract_age_from_response(response)
         
         if fetch_history:
             logger.info(f"Found age: {age}, history entries: {len(rating_history)} for {player_name}")
@@ -297,36 +375,48 @@ def fetch_player_page_data(player_link: str, player_name: str, fetch_history: bo
         logger.warning(f"Error fetching player data from {player_link}: {e}")
         return age, rating_history
 
-def fetch_multiple_players_data(players_with_links: List[Tuple[str, str]], fetch_history: bool = False) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
-    """Fetch ages and optionally rating history for multiple players concurrently."""
-    age_results = {}
-    all_history = []
-    
-    def fetch_single_player(player_data):
-        player_name, player_link = player_data
-        age, history = fetch_player_page_data(player_link, player_name, fetch_history)
-        return player_name, age, history
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=ScraperConfig.CONCURRENT_WORKERS) as executor:
-        future_to_player = {
-            executor.submit(fetch_single_player, player_data): player_data[0] 
-            for player_data in players_with_links
-        }
+def submit_player_fetches(executor: concurrent.futures.Executor, players: List[Dict[str, str]],
+                          link_fetches: Dict[str, concurrent.futures.Future],
+                          fetch_history: bool = False) -> List[Tuple[Dict[str, str], concurrent.futures.Future, bool]]:
+    """Queue detail-page fetches for players with a link without waiting for them.
+    
+    link_fetches maps every link queued so far in the run to its future, so a
+    link seen again reuses the earlier fetch instead of hitting the site twice.
+    """
+    pending = []
+    for player in players:
+        player_link = player["PlayerLink"]
+        if not player_link:
+            continue
         
-        for future in concurrent.futures.as_completed(future_to_player):
-            player_name = future_to_player[future]
-            try:
-                name, age, history = future.result()
-                age_results[name] = age
-                if history:
-                    all_history.extend(history)
-                if not age:
-                    logger.warning(f"Could not fetch age for {name}")
-            except Exception as e:
-                logger.error(f"Error fetching data for {player_name}: {e}")
-                age_results[player_name] = None
-    
-    return age_results, all_history
+        future = link_fetches.get(player_link)
+        is_new = future is None
+        if is_new:
+            future = executor.submit(fetch_player_page_data, player_link, player["Name"], fetch_history,
+                                     player["Gender"], player["Province"])
+            link_fetches[player_link] = future
+        pending.append((player, future, is_new))
+    
+    return pending
+
+def collect_player_fetches(pending: List[Tuple[Dict[str, str], concurrent.futures.Future, bool]],
+                           all_history: List[Dict[str, str]]) -> None:
+    """Wait for queued detail-page fetches, storing ages on players and collecting history."""
+    for player, future, is_new in pending:
+        try:
+            age, history = future.result()
+        except Exception as e:
+            logger.error(f"Error fetching data for {player['Name']}: {e}")
+            continue
+        
+        player["Age"] = age or ""
+        # A reused fetch already contributed its history the first time
+        if history and is_new:
+            all_history.extend(history)
+        if not age:
+            logger.warning(f"Could not fetch age for {player['Name']}")
+    
+    pending.clear()
 
 def build_request_params(gender: str, page: int) -> Dict[str, str]:
     """Build request parameters for player listing page."""
@@ -337,68 +427,118 @@ def build_request_params(gender: str, page: int) -> Dict[str, str]:
         "Formv_ctta_ratings_Page": page,
     }
 
+# Compiled once; evaluated for every listing row
+PLAYER_CELLS_XPATH = lxml.etree.XPath("./td")
+LINK_HREF_XPATH = lxml.etree.XPath(".//a/@href")
+
 def parse_player_row(row) -> Optional[Dict[str, str]]:
-    """Parse a single player row from the table."""
-    cols = row.find_all("td")
-    if len(cols) < 7:
+    """Parse a single lxml player row from the table."""
+    cells = PLAYER_CELLS_XPATH(row)
+    if len(cells) < 7:
+        return None
+    
+    # itertext works on both lxml.html and plain lxml.etree (iterparse) elements
+    name, province, gender, rating, period, last_played = (
+        "".join(cell.itertext()).strip() for cell in cells[1:7]
+    )
+    
+    # Reject pagination/footer rows before allocating a record for them
+    if not validate_player_fields(name, province, rating, period, last_played):
         return None
     
     # Extract player link
-    player_link = None
-    name_cell = cols[1]
-    link_tag = name_cell.find("a")
-    if link_tag and link_tag.get("href"):
-        player_link = link_tag.get("href")
-    
-    player = {
-        "Name": cols[1].get_text(strip=True),
-        "Province": cols[2].get_text(strip=True),
-        "Gender": cols[3].get_text(strip=True),
-        "Rating": cols[4].get_text(strip=True),
-        "Period": cols[5].get_text(strip=True),
-        "Last Played": cols[6].get_text(strip=True),
+    hrefs = LINK_HREF_XPATH(cells[1])
+    player_link = hrefs[0] if hrefs else None
+    
+    return {
+        "Name": name,
+        "Province": province,
+        "Gender": gender,
+        "Rating": rating,
+        "Period": period,
+        "Last Played": last_played,
         "Age": "",
         "PlayerLink": player_link
     }
-    
-    return player if validate_player_data(player) else None
 
-def scrape_players_page(gender: str, page: int) -> List[Dict[str, str]]:
-    """Scrape a single page of players."""
+def is_result_table(table) -> bool:
+    """Check whether a table element is the listing's resultTable."""
+    return "resultTable" in (table.get("class") or "").split()
+
+def scrape_players_page(gender: str, page: int) -> Optional[List[Dict[str, str]]]:
+    """Scrape a single page of players, returning None if the page could not be fetched or parsed."""
     params = build_request_params(gender, page)
     
     try:
-        response = make_request_with_retries(ScraperConfig.TTCAN_BASE_URL, params=params)
-        soup = BeautifulSoup(response.content, "html.parser")
-        table = soup.find("table", class_="resultTable")
-        
-        if not table:
-            return []
-        
-        rows = table.find_all("tr")
-        if len(rows) <= 1:
-            return []
-        
         players = []
-        for row in rows[1:]:  # Skip header
-            player = parse_player_row(row)
-            if player:
-                players.append(player)
-            else:
-                logger.debug(f"Skipped invalid row on page {page} (likely pagination/footer)")
+        result_table_done = False
+        
+        # Page bodies may come from the HTTP cache, so iterparse reads the buffered
+        # bytes and handles each table as soon as it closes
+        response = make_request_with_retries(ScraperConfig.TTCAN_BASE_URL, params=params)
+        logger.debug("Page %s transfer encoding: %s", page, response.headers.get("Content-Encoding", "identity"))
+        # Anything but the result table is released as soon as it closes, so the
+        # tree never holds more than the results plus the bare page skeleton
+        for _, element in lxml.etree.iterparse(io.BytesIO(response.content), events=("end",),
+                                               tag=("table", "script", "style"), html=True):
+            if element.tag != "table" or result_table_done:
+                element.clear(keep_tail=True)
+                continue
+            if not is_result_table(element):
+                if not any(is_result_table(outer) for outer in element.iterancestors("table")):
+                    element.clear(keep_tail=True)
+                continue
+            
+            result_table_done = True
+            rows = element.iter("tr")
+            next(rows, None)  # Skip header
+            for row in rows:
+                player = parse_player_row(row)
+                if player:
+                    players.append(player)
+                else:
+                    logger.debug("Skipped invalid row on page %s (likely pagination/footer)", page)
+                row.clear()  # Only the current row's cells are alive at any time
+            element.clear(keep_tail=True)
         
         return players
         
     except Exception as e:
         logger.error(f"Error parsing page {page}: {e}")
-        return []
+        return None
+
+# Long-lived pools for listing and player pages; their sizes are the concurrency caps
+PAGE_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=ScraperConfig.PAGE_PREFETCH)
+DETAIL_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=ScraperConfig.CONCURRENT_WORKERS)
+
+def fetch_players_pages(gender: str, pages: List[int]) -> List[Optional[List[Dict[str, str]]]]:
+    """Fetch several listing pages concurrently, returning results in page order."""
+    return list(PAGE_EXECUTOR.map(lambda page: scrape_players_page(gender, page), pages))
 
 def scrape_all_players_by_gender(gender: str, max_pages: Optional[int] = None, fetch_history: bool = False, 
-                                session_id: str = None, resume_from_page: int = 1) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
-    """Scrape all players of a specific gender with resume capability."""
+                                session_id: str = None, resume_from_page: int = 1,
+                                known_players: Optional[List[Dict[str, str]]] = None,
+                                known_history_count: int = 0) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """Scrape all players of a specific gender with resume capability.
+    
+    Players matching one in known_players (e.g. those loaded for a resume) are
+    treated as duplicates and neither returned nor fetched again. Checkpoints
+    count them, and the known_history_count entries loaded with them, toward the session totals.
+    """
     all_players = []
     all_history = []
     page = resume_from_page
+    prefetched_pages = []
+    
+    # Detail pages are fetched in the background while later listing pages
+    # are processed; results are only awaited at checkpoints and at the end.
+    pending_fetches = []
+    link_fetches = {}
+    players_written = history_written = 0  # Records already appended to the session's temp files
+    seen_players = {(player["Name"], player["Rating"], player["Province"]) for player in known_players or ()}
+    prior_counts = (len(known_players or ()), known_history_count)
+    duplicate_count = 0
+    listing_complete = False  # Set once the listing runs out or max_pages is reached, not on a failed page
     
     logger.info(f"Scraping {gender or 'all'} players starting from page {page}...")
     
@@ -409,97 +549,89 @@ def scrape_all_players_by_gender(gender: str, max_pages: Optional[int] = None, f
         try:
             if max_pages and page > max_pages:
                 logger.info(f"Reached max pages limit ({max_pages}), stopping.")
+                listing_complete = True
                 break
             
-            logger.info(f"Fetching {gender or 'all'} page {page}...")
-            page_players = scrape_players_page(gender, page)
+            # Speculatively fetch the next window of listing pages in parallel
+            if not prefetched_pages:
+                window_end = page + ScraperConfig.PAGE_PREFETCH
+                if max_pages:
+                    window_end = min(window_end, max_pages + 1)
+                logger.info(f"Fetching {gender or 'all'} pages {page}-{window_end - 1}...")
+                prefetched_pages = fetch_players_pages(gender, list(range(page, window_end)))
+            
+            page_players = prefetched_pages.pop(0)
+            
+            if page_players is None:
+                logger.warning(f"Page {page} failed, stopping; a resume continues from this page")
+                break
             
             if not page_players:
                 logger.info("No valid players found on this page. Stopping scraping.")
+                listing_complete = True
                 break
             
-            # Extract players with links for data fetching
-            players_with_links = [
-                (player["Name"], player["PlayerLink"]) 
-                for player in page_players 
-                if player["PlayerLink"]
-            ]
+            # Drop duplicates (by name, rating and province) before any detail page is fetched
+            unique_page_players = []
+            for player in page_players:
+                player_key = (player["Name"], player["Rating"], player["Province"])
+                if player_key in seen_players:
+                    duplicate_count += 1
+                    logger.debug("Duplicate player found: %s (Rating: %s)", player["Name"], player["Rating"])
+                    continue
+                seen_players.add(player_key)
+                unique_page_players.append(player)
+            page_players = unique_page_players
             
-            # Fetch ages and optionally history in one pass
-            if players_with_links:
-                if fetch_history:
-                    logger.info(f"Fetching ages and history for {len(players_with_links)} {gender or 'all'} players concurrently...")
-                    age_results, history_data = fetch_multiple_players_data(players_with_links, fetch_history=True)
-                    all_history.extend(history_data)
-                else:
-                    logger.info(f"Fetching ages for {len(players_with_links)} {gender or 'all'} players concurrently...")
-                    age_results, _ = fetch_multiple_players_data(players_with_links, fetch_history=False)
-                
-                # Update players with age data
-                for player in page_players:
-                    if player["Name"] in age_results:
-                        player["Age"] = age_results[player["Name"]] or ""
+            # Queue ages and optionally history for this page without blocking
+            page_fetches = submit_player_fetches(DETAIL_EXECUTOR, page_players, link_fetches, fetch_history)
+            if page_fetches:
+                what = "ages and history" if fetch_history else "ages"
+                logger.info(f"Queued {what} for {len(page_fetches)} {gender or 'all'} players")
+                pending_fetches.extend(page_fetches)
             
             all_players.extend(page_players)
             logger.info(f"Page {page}: {len(page_players)} valid players (Total so far: {len(all_players)})")
             
-            # Save progress periodically
+            # Save progress periodically, once every queued fetch has landed
             if session_id and page % save_progress_every == 0:
-                save_progress_state(session_id, page, all_players, all_history)
-                update_temp_files_incremental(all_players, all_history, session_id)
-                logger.info(f"Progress checkpoint saved at page {page}")
+                collect_player_fetches(pending_fetches, all_history)
+                queue_checkpoint(session_id, page, all_players, all_history, players_written, history_written,
+                                 prior_counts=prior_counts)
+                players_written, history_written = len(all_players), len(all_history)
+                logger.info(f"Progress checkpoint queued at page {page}")
             
             page += 1
-            time.sleep(ScraperConfig.PAGE_DELAY)
             
         except Exception as e:
             logger.error(f"Error scraping page {page}: {e}")
             
+            collect_player_fetches(pending_fetches, all_history)
+            
             # Save progress before potentially failing
             if session_id:
                 logger.info(f"Saving progress before handling error...")
-                save_progress_state(session_id, page - 1, all_players, all_history)
-                update_temp_files_incremental(all_players, all_history, session_id)
+                queue_checkpoint(session_id, page - 1, all_players, all_history,
+                                 players_written, history_written, prior_counts=prior_counts).result()
             
             # Re-raise the exception to be handled by the calling function
             raise e
     
-    # Save final progress
+    collect_player_fetches(pending_fetches, all_history)
+    
+    # Save final progress; the single writer finishes any queued checkpoint first
     if session_id:
-        save_progress_state(session_id, page - 1, all_players, all_history)
-        update_temp_files_incremental(all_players, all_history, session_id)
+        queue_checkpoint(session_id, page - 1, all_players, all_history, players_written, history_written,
+                         stage="upload" if listing_complete else "scraping",
+                         prior_counts=prior_counts).result()
     
-    logger.info(f"Total {gender or 'all'} players found: {len(all_players)}")
+    logger.info(f"Total {gender or 'all'} unique players found: {len(all_players)} (skipped {duplicate_count} duplicates)")
     return all_players, all_history
 
-def deduplicate_players(players: List[Dict[str, str]]) -> List[Dict[str, str]]:
-    """Remove duplicate players based on name, rating, and province."""
-    seen_players = set()
-    unique_players = []
-    
-    for player in players:
-        player_key = (player["Name"], player["Rating"], player["Province"])
-        if player_key not in seen_players:
-            seen_players.add(player_key)
-            unique_players.append(player)
-        else:
-            logger.debug(f"Duplicate player found: {player['Name']} (Rating: {player['Rating']})")
-    
-    return unique_players
-
-def enrich_history_with_player_data(history_data: List[Dict[str, str]], players: List[Dict[str, str]]) -> None:
-    """Enrich history data with current player information."""
-    player_lookup = {player["Name"]: player for player in players}
-    
-    for history_entry in history_data:
-        player_name = history_entry["PlayerName"]
-        if player_name in player_lookup:
-            current_player = player_lookup[player_name]
-            history_entry["Gender"] = current_player.get("Gender", "")
-            history_entry["Province"] = current_player.get("Province", "")
-
 def scrape_all_ttcan_players(fetch_all_history: bool = False, session_id: str = None, 
-                            resume_from_page: int = 1) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+                            resume_from_page: int = 1,
+                            known_players: Optional[List[Dict[str, str]]] = None,
+                            known_history_count: int = 0) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
     """Scrape all players and optionally fetch rating history for all players with resume capability."""
     if not session_id:
         session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -510,64 +642,69 @@ def scrape_all_ttcan_players(fetch_all_history: bool = False, session_id: str =
     all_players, all_history = scrape_all_players_by_gender('', max_pages=None, 
                                                            fetch_history=fetch_all_history,
                                                            session_id=session_id,
-                                                           resume_from_page=resume_from_page)
-    
-    # Deduplicate players
-    unique_players = deduplicate_players(all_players)
-    logger.info(f"Total unique players found: {len(unique_players)} (removed {len(all_players) - len(unique_players)} duplicates)")
+                                                           resume_from_page=resume_from_page,
+                                                           known_players=known_players,
+                                                           known_history_count=known_history_count)
     
-    # Enrich history data if available
     if all_history:
-        enrich_history_with_player_data(all_history, unique_players)
         logger.info(f"Collected {len(all_history)} historical rating entries")
     
-    return unique_players, all_history
+    return all_players, all_history
 
 # ==== LOCAL FILE CACHING ====
-def save_data_to_temp_file(data: List[Dict], data_type: str, session_id: str = None) -> str:
-    """Save scraped data to a temporary file and return the file path."""
+# Temp files live next to the script; player and history files are gzipped JSON
+# Lines so checkpoints can append to them (each append adds a gzip member).
+# Whole-array .json files from earlier runs are still found and read.
+TEMP_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMP_DATA_SUFFIXES = ('.jsonl.gz', '.json')
+PLAYERS_FILE_PATTERN = re.compile(r'ttcan_players_(\d{8}_\d{6})\.json(?:l\.gz)?')
+
+def save_data_to_temp_file(data: List[Dict], data_type: str, session_id: str = None, append: bool = False) -> str:
+    """Save (or append) scraped data to a temporary file and return the file path."""
     if session_id is None:
         session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    filename = f"ttcan_{data_type}_{session_id}.json"
+    filename = f"ttcan_{data_type}_{session_id}.jsonl.gz"
     
-    # Create temp file in the same directory as the script
-    temp_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(temp_dir, filename)
+    file_path = os.path.join(TEMP_DIR, filename)
     
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # Level 1 keeps compression cheap while still shrinking JSON several-fold
+        with gzip.open(file_path, 'ab' if append else 'wb', compresslevel=1) as f:
+            f.writelines(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE) for record in data)
         
-        logger.info(f"Saved {len(data)} {data_type} records to {filename}")
+        logger.info(f"{'Appended' if append else 'Saved'} {len(data)} {data_type} records to {filename}")
         return file_path
     
     except Exception as e:
         logger.error(f"Failed to save {data_type} data to file: {e}")
         return None
 
-def save_progress_state(session_id: str, last_page: int, completed_players: List[Dict], completed_history: List[Dict], 
-                       upload_state: Dict = None) -> str:
-    """Save current scraping and upload progress state."""
+def save_progress_state(session_id: str, last_page: int, players_count: int, history_count: int, 
+                       upload_state: Dict = None, stage: str = "scraping") -> str:
+    """Save current scraping and upload progress state.
+    
+    stage is "scraping" while pages remain and "upload" once every page has been scraped.
+    """
     progress_data = {
         "session_id": session_id,
         "last_completed_page": last_page,
         "timestamp": datetime.now().isoformat(),
-        "players_count": len(completed_players),
-        "history_count": len(completed_history),
+        "players_count": players_count,
+        "history_count": history_count,
         "status": "in_progress",
+        "stage": stage,
         "upload_state": upload_state or {}
     }
     
     filename = f"ttcan_progress_{session_id}.json"
-    temp_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(temp_dir, filename)
+    file_path = os.path.join(TEMP_DIR, filename)
     
     try:
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(progress_data, f, indent=2)
         
-        logger.info(f"Progress saved: page {last_page}, {len(completed_players)} players, {len(completed_history)} history entries")
+        logger.info(f"Progress saved: page {last_page}, {players_count} players, {history_count} history entries")
         if upload_state:
             logger.info(f"Upload state: {upload_state}")
         return file_path
@@ -579,21 +716,21 @@ def save_progress_state(session_id: str, last_page: int, completed_players: List
 
 def load_progress_state(session_id: str = None) -> Dict:
     """Load the most recent progress state."""
-    temp_dir = os.path.dirname(os.path.abspath(__file__))
-    
     try:
         if session_id:
             # Load specific session
-            progress_file = os.path.join(temp_dir, f"ttcan_progress_{session_id}.json")
+            progress_file = os.path.join(TEMP_DIR, f"ttcan_progress_{session_id}.json")
             if os.path.exists(progress_file):
                 with open(progress_file, 'r', encoding='utf-8') as f:
                     return json.load(f)
         else:
             # Find the most recent progress file
-            progress_files = [f for f in os.listdir(temp_dir) if f.startswith('ttcan_progress_') and f.endswith('.json')]
-            if progress_files:
-                latest_file = max(progress_files)
-                progress_file = os.path.join(temp_dir, latest_file)
+            with os.scandir(TEMP_DIR) as entries:
+                latest_file = max((entry.name for entry in entries
+                                   if entry.name.startswith('ttcan_progress_') and entry.name.endswith('.json')),
+                                  default=None)
+            if latest_file:
+                progress_file = os.path.join(TEMP_DIR, latest_file)
                 with open(progress_file, 'r', encoding='utf-8') as f:
                     progress_data = json.load(f)
                     logger.info(f"Found previous session: {progress_data.get('session_id', 'unknown')}")
@@ -604,18 +741,48 @@ def load_progress_state(session_id: str = None) -> Dict:
     
     return {}
 
-def update_temp_files_incremental(players: List[Dict], history: List[Dict], session_id: str):
-    """Update temp files incrementally during scraping."""
+def update_temp_files_incremental(new_players: List[Dict], new_history: List[Dict], session_id: str):
+    """Append records scraped since the last checkpoint to the session's temp files."""
     try:
-        # Save current progress
-        players_file = save_data_to_temp_file(players, "players", session_id)
-        history_file = save_data_to_temp_file(history, "history", session_id) if history else None
+        players_file = save_data_to_temp_file(new_players, "players", session_id, append=True)
+        history_file = save_data_to_temp_file(new_history, "history", session_id, append=True) if new_history else None
         
         return players_file, history_file
     except Exception as e:
         logger.error(f"Failed to update temp files: {e}")
         return None, None
 
+# One writer thread, so checkpoints land in order without blocking the scraping loop
+CHECKPOINT_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+def save_checkpoint(session_id: str, last_page: int, new_players: List[Dict], new_history: List[Dict],
+                    players_count: int, history_count: int, stage: str = "scraping") -> None:
+    """Append new records to the temp files, then record the progress they cover."""
+    update_temp_files_incremental(new_players, new_history, session_id)
+    save_progress_state(session_id, last_page, players_count, history_count, stage=stage)
+
+def queue_checkpoint(session_id: str, last_page: int, players: List[Dict], history: List[Dict],
+                     players_written: int, history_written: int, stage: str = "scraping",
+                     prior_counts: Tuple[int, int] = (0, 0)) -> concurrent.futures.Future:
+    """Queue a checkpoint write of the records past the *_written offsets on the background writer.
+    
+    Only slices are handed over, so the writer never sees the lists grow; the
+    records in them are complete by the time a checkpoint is taken. prior_counts
+    holds the players and history entries already saved by a resumed session, so
+    the recorded counts cover the whole session.
+    """
+    return CHECKPOINT_EXECUTOR.submit(save_checkpoint, session_id, last_page,
+                                      players[players_written:], history[history_written:],
+                                      prior_counts[0] + len(players), prior_counts[1] + len(history), stage)
+
+def is_checkpoint_stale(progress_state: Dict) -> bool:
+    """Check whether a saved progress state is older than CHECKPOINT_TTL_HOURS."""
+    try:
+        saved_at = datetime.fromisoformat(progress_state["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return datetime.now() - saved_at > timedelta(hours=ScraperConfig.CHECKPOINT_TTL_HOURS)
+
 def load_data_from_temp_file(file_path: str, data_type: str) -> List[Dict]:
     """Load data from a temporary file."""
     try:
@@ -623,8 +790,27 @@ def load_data_from_temp_file(file_path: str, data_type: str) -> List[Dict]:
             logger.warning(f"Temp file not found: {file_path}")
             return []
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if file_path.endswith('.json'):
+            # Older runs wrote a single JSON array
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            logger.info(f"Loaded {len(data)} {data_type} records from {os.path.basename(file_path)}")
+            return data
+        
+        data = []
+        with gzip.open(file_path, 'rb') as f:
+            try:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        data.append(orjson.loads(line))
+                    except orjson.JSONDecodeError:
+                        # A checkpoint interrupted mid-write leaves at most one partial line
+                        logger.warning(f"Skipped unreadable record in {os.path.basename(file_path)}")
+            except (EOFError, gzip.BadGzipFile):
+                # ...or a truncated last gzip member; keep what was read before it
+                logger.warning(f"Ignored truncated data at the end of {os.path.basename(file_path)}")
         
         logger.info(f"Loaded {len(data)} {data_type} records from {os.path.basename(file_path)}")
         return data
@@ -648,19 +834,18 @@ def cleanup_session_files(session_id: str):
     if not session_id:
         return
     
-    temp_dir = os.path.dirname(os.path.abspath(__file__))
-    
     try:
         # Find all files with this session ID
-        session_files = [
-            f for f in os.listdir(temp_dir) 
-            if f.endswith('.json') and session_id in f
-        ]
+        with os.scandir(TEMP_DIR) as entries:
+            session_files = [
+                entry for entry in entries
+                if entry.name.endswith(TEMP_DATA_SUFFIXES) and session_id in entry.name
+            ]
         
-        for filename in session_files:
-            file_path = os.path.join(temp_dir, filename)
+        for entry in session_files:
+            filename = entry.name
             try:
-                os.remove(file_path)
+                os.remove(entry.path)
                 logger.info(f"Cleaned up session file: {filename}")
             except Exception as e:
                 logger.warning(f"Failed to remove session file {filename}: {e}")
@@ -670,24 +855,22 @@ def cleanup_session_files(session_id: str):
 
 def find_latest_temp_files() -> Tuple[Optional[str], Optional[str]]:
     """Find the most recent temp files for players and history."""
-    temp_dir = os.path.dirname(os.path.abspath(__file__))
-    
     players_file = None
     history_file = None
     
     try:
-        # Find all temp files
-        temp_files = [f for f in os.listdir(temp_dir) if f.startswith('ttcan_') and f.endswith('.json')]
-        
-        # Find latest players file
-        players_files = [f for f in temp_files if 'players_' in f]
-        if players_files:
-            players_file = os.path.join(temp_dir, max(players_files))
-        
-        # Find latest history file
-        history_files = [f for f in temp_files if 'history_' in f]
-        if history_files:
-            history_file = os.path.join(temp_dir, max(history_files))
+        # Track the latest players and history file in one pass over the directory
+        with os.scandir(TEMP_DIR) as entries:
+            for entry in entries:
+                name = entry.name
+                if not (name.startswith('ttcan_') and name.endswith(TEMP_DATA_SUFFIXES)):
+                    continue
+                if 'players_' in name:
+                    if players_file is None or name > os.path.basename(players_file):
+                        players_file = entry.path
+                elif 'history_' in name:
+                    if history_file is None or name > os.path.basename(history_file):
+                        history_file = entry.path
         
         if players_file:
             logger.info(f"Found latest players file: {os.path.basename(players_file)}")
@@ -728,69 +911,100 @@ def handle_google_api_error(error) -> bool:
     # Otherwise check if it's a retryable error
     return any(err in error_str for err in retryable_errors)
 
-def write_to_sheet_with_retry(sheet_obj, rows: List[List[str]], header: List[str], max_retries: int = 3) -> bool:
-    """Write data to Google Sheets with retry logic for 502/503 errors."""
-    
-    total_batches = (len(rows) + ScraperConfig.BATCH_SIZE - 1) // ScraperConfig.BATCH_SIZE
-    
-    # Clear sheet and add header
-    sheet_obj.clear()
-    sheet_obj.append_row(header)
-    
+def split_rows_by_payload(values: Iterable[List[str]], max_bytes: int) -> List[Tuple[int, List[List[str]]]]:
+    """Group rows into consecutive (start_index, rows) slices whose JSON size stays under max_bytes.
+    
+    values may be a generator; rows are placed straight into their slice, so no
+    separate full row list is built.
+    """
+    slices = []
+    batch = []
+    start_idx = 0
+    payload_bytes = 0
+    for row in values:
+        row_bytes = len(orjson.dumps(row)) + 1  # Separator between rows
+        if batch and payload_bytes + row_bytes > max_bytes:
+            slices.append((start_idx, batch))
+            start_idx += len(batch)
+            batch, payload_bytes = [], 0
+        batch.append(row)
+        payload_bytes += row_bytes
+    if batch:
+        slices.append((start_idx, batch))
+    return slices
+
+# Batch updates target disjoint ranges, so they can be sent concurrently
+UPLOAD_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=ScraperConfig.UPLOAD_CONCURRENCY)
+# Every Sheets write (resizes, retries and both worksheets) draws from one process-wide budget
+SHEETS_WRITE_BUCKET = TokenBucket(ScraperConfig.SHEETS_WRITES_PER_MINUTE / 60, ScraperConfig.UPLOAD_CONCURRENCY)
+
+def upload_rows_to_range(sheet_obj, start_idx: int, batch: List[List[str]], width: int) -> None:
+    """Overwrite the fixed range starting at row start_idx + 1 with one batch update."""
+    end_cell = rowcol_to_a1(start_idx + len(batch), width)
+    SHEETS_WRITE_BUCKET.acquire()
+    sheet_obj.batch_update([{"range": f"A{start_idx + 1}:{end_cell}", "values": batch}],
+                           value_input_option="RAW")
+
+def write_to_sheet_with_retry(sheet_obj, rows: Iterable[List[str]], header: List[str], max_retries: int = 3) -> bool:
+    """Write data to Google Sheets in payload-sized batch updates with retry logic for 502/503 errors."""
+    slices = split_rows_by_payload(itertools.chain([header], rows), ScraperConfig.UPLOAD_MAX_BYTES)
+    total_batches = len(slices)
+    total_rows = sum(len(batch) for _, batch in slices)
+    
+    # Size the grid to the data: trailing rows from older uploads are dropped and
+    # every range update is in bounds, so no separate clear() call is needed
+    if (sheet_obj.row_count, sheet_obj.col_count) != (total_rows, len(header)):
+        SHEETS_WRITE_BUCKET.acquire()
+        sheet_obj.resize(rows=total_rows, cols=len(header))
+    
+    completed_batches = set()
     for session_attempt in range(max_retries):
         try:
+            pending_batches = [idx for idx in range(total_batches) if idx not in completed_batches]
             logger.info(f"Attempting to write to Google Sheet (attempt {session_attempt + 1}/{max_retries})")
-            logger.info(f"📤 Starting upload - {total_batches} batches of {ScraperConfig.BATCH_SIZE} rows each")
+            logger.info(f"📤 Starting upload - {len(pending_batches)} batch updates of up to {ScraperConfig.UPLOAD_MAX_BYTES} bytes each")
             
-            # Upload all batches
-            for batch_idx in range(total_batches):
-                start_idx = batch_idx * ScraperConfig.BATCH_SIZE
-                end_idx = min(start_idx + ScraperConfig.BATCH_SIZE, len(rows))
-                batch = rows[start_idx:end_idx]
-                
-                logger.info(f"📦 Uploading batch {batch_idx + 1}/{total_batches}: {len(batch)} rows (rows {start_idx + 1}-{end_idx})")
-                
-                batch_attempt = 0
-                batch_max_retries = 2
-                
-                while batch_attempt < batch_max_retries:
-                    try:
-                        sheet_obj.append_rows(batch, value_input_option="RAW")
-                        logger.info(f"✅ Batch {batch_idx + 1}/{total_batches} uploaded successfully")
-                        break
-                    except Exception as batch_error:
-                        batch_attempt += 1
-                        if handle_google_api_error(batch_error) and batch_attempt < batch_max_retries:
-                            wait_time = (2 ** batch_attempt) + 1
-                            logger.warning(f"⚠️  Batch {batch_idx + 1} failed (retry {batch_attempt}/{batch_max_retries}), retrying in {wait_time}s: {batch_error}")
-                            time.sleep(wait_time)
-                        else:
-                            logger.error(f"❌ Batch {batch_idx + 1} failed after {batch_max_retries} attempts: {batch_error}")
-                            raise batch_error
-                
-                time.sleep(ScraperConfig.BATCH_DELAY)
+            # Each batch overwrites a fixed range, so a retry only resends the batches that failed
+            futures = {
+                UPLOAD_EXECUTOR.submit(upload_rows_to_range, sheet_obj, *slices[batch_idx], len(header)): batch_idx
+                for batch_idx in pending_batches
+            }
+            first_error = None
+            for future in concurrent.futures.as_completed(futures):
+                batch_idx = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    first_error = first_error or e
+                    continue
+                completed_batches.add(batch_idx)
+                start_idx, batch = slices[batch_idx]
+                logger.info(f"✅ Batch {batch_idx + 1}/{total_batches} uploaded (rows {start_idx + 1}-{start_idx + len(batch)})")
+            if first_error:
+                raise first_error
             
-            logger.info(f"🎉 Upload completed successfully - {len(rows)} total rows uploaded")
+            logger.info(f"🎉 Upload completed successfully - {total_rows - 1} total rows uploaded")
             return True
             
         except Exception as e:
             if handle_google_api_error(e) and session_attempt < max_retries - 1:
                 wait_time = (2 ** session_attempt) * 5  # Exponential backoff: 5s, 10s, 20s
-                logger.warning(f"💥 Upload session {session_attempt + 1} failed, retrying entire session in {wait_time}s: {e}")
+                logger.warning(f"💥 Upload attempt {session_attempt + 1} failed with {total_batches - len(completed_batches)} batches left, retrying in {wait_time}s: {e}")
                 time.sleep(wait_time)
-                # Clear and re-add header for retry
-                sheet_obj.clear()
-                sheet_obj.append_row(header)
             else:
-                logger.error(f"🔥 Upload failed permanently after {max_retries} session attempts: {e}")
+                logger.error(f"🔥 Upload failed permanently after {session_attempt + 1} attempts: {e}")
                 return False
     
     return False
 
-def write_to_sheet_in_batches(sheet_obj, rows: List[List[str]], header: List[str]) -> bool:
+def write_to_sheet_in_batches(sheet_obj, rows: Iterable[List[str]], header: List[str]) -> bool:
     """Write data to Google Sheets in batches with retry logic."""
     return write_to_sheet_with_retry(sheet_obj, rows, header)
 
+# Row builders bound once; Age and the history Gender/Province tags may be absent from older temp files
+PLAYER_ROW_GETTER = itemgetter("Name", "Province", "Gender", "Rating", "Period", "Last Played")
+HISTORY_ROW_GETTER = itemgetter("PlayerName", "Period", "Rating", "LastPlayed")
+
 def write_players_to_sheet(players: List[Dict[str, str]], session_id: str = None) -> bool:
     """Write player data to Google Sheets with resumable upload."""
     if not players:
@@ -798,21 +1012,21 @@ def write_players_to_sheet(players: List[Dict[str, str]], session_id: str = None
         return False
     
     header = ["Name", "Province", "Gender", "Rating", "Period", "Last Played", "Age"]
-    rows = [
-        [p["Name"], p["Province"], p["Gender"], p["Rating"], p["Period"], p["Last Played"], p.get("Age", "")]
-        for p in players
-    ]
+    gender_counts = {}
     
-    success = write_to_sheet_with_retry(sheet, rows, header)
+    def iter_player_rows():
+        # Rows are produced while the upload slices are filled; genders are tallied on the way
+        for p in players:
+            row = list(PLAYER_ROW_GETTER(p))
+            row.append(p.get("Age", ""))
+            gender_counts[row[2]] = gender_counts.get(row[2], 0) + 1
+            yield row
+    
+    success = write_to_sheet_with_retry(sheet, iter_player_rows(), header)
     
     if success:
-        # Log gender distribution
-        gender_counts = {}
-        for player in players:
-            gender = player.get('Gender', 'Unknown')
-            gender_counts[gender] = gender_counts.get(gender, 0) + 1
         logger.info(f"Gender distribution: {gender_counts}")
-        logger.info(f"Successfully uploaded {len(rows)} rows to Google Sheet")
+        logger.info(f"Successfully uploaded {len(players)} rows to Google Sheet")
     
     return success
 
@@ -825,23 +1039,32 @@ def write_history_to_sheet(history_data: List[Dict[str, str]], session_id: str =
     try:
         # Get or create the RatingHistory sheet
         try:
-            history_sheet = gc.open_by_key(ScraperConfig.SHEET_ID).worksheet("RatingHistory")
+            history_sheet = get_worksheet("RatingHistory")
         except gspread.WorksheetNotFound:
             logger.info("Creating RatingHistory sheet...")
-            spreadsheet = gc.open_by_key(ScraperConfig.SHEET_ID)
-            history_sheet = spreadsheet.add_worksheet(title="RatingHistory", rows=10000, cols=6)
+            history_sheet = sheet.spreadsheet.add_worksheet(title="RatingHistory", rows=10000, cols=6)
         
         header = ["PlayerName", "Period", "Rating", "LastPlayed", "Gender", "Province"]
-        rows = [
-            [entry.get("PlayerName", ""), entry.get("Period", ""), entry.get("Rating", ""),
-             entry.get("LastPlayed", ""), entry.get("Gender", ""), entry.get("Province", "")]
-            for entry in history_data
-        ]
+        seen = set()
+        
+        def iter_history_rows():
+            # Only exact repeats are dropped; same-name players differ by Gender/Province
+            for entry in history_data:
+                row = list(HISTORY_ROW_GETTER(entry))
+                row.append(entry.get("Gender", ""))
+                row.append(entry.get("Province", ""))
+                key = tuple(row)
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield row
         
-        success = write_to_sheet_with_retry(history_sheet, rows, header)
+        success = write_to_sheet_with_retry(history_sheet, iter_history_rows(), header)
         
         if success:
-            logger.info(f"Successfully uploaded {len(rows)} history entries to RatingHistory sheet")
+            if len(seen) < len(history_data):
+                logger.info(f"Skipped {len(history_data) - len(seen)} repeated history rows")
+            logger.info(f"Successfully uploaded {len(seen)} history entries to RatingHistory sheet")
         
         return success
         
@@ -861,6 +1084,10 @@ if __name__ == "__main__":
         use_cache = "--use-cache" in sys.argv
         resume = "--resume" in sys.argv
         
+        if "--no-http-cache" in sys.argv:
+            logger.info("Clearing cached TTCan pages...")
+            SESSION.cache.clear()
+        
         # Show upload status if requested
         if "--status" in sys.argv:
             progress_state = load_progress_state()
@@ -869,6 +1096,7 @@ if __name__ == "__main__":
                 print(f"\nSession: {session_id}")
                 print(f"Last updated: {progress_state.get('timestamp', 'Unknown')}")
                 print(f"Scraping status: {progress_state.get('status', 'Unknown')}")
+                print(f"Stage: {progress_state.get('stage', 'scraping')}")
                 print(f"Players: {progress_state.get('players_count', 0)}")
                 print(f"History entries: {progress_state.get('history_count', 0)}")
                 
@@ -898,12 +1126,14 @@ Usage:
   python scrapping.py --use-cache        # Use cached data instead of re-scraping
   python scrapping.py --resume           # Resume from last interrupted scraping session
   python scrapping.py --status           # Show current session and upload status
+  python scrapping.py --no-http-cache    # Refetch every page instead of reusing cached HTML
 
 Options:
   --history      Fetch rating history for all players (slower)
   --use-cache    Use previously cached data instead of re-scraping
   --resume       Resume from the last interrupted scraping session
   --status       Show progress and upload status of current session
+  --no-http-cache  Clear the local page cache (pages are otherwise reused for 24h)
   --help, -h     Show this help message
 
 Examples:
@@ -931,13 +1161,18 @@ Examples:
         history = []
         session_id = None
         resume_from_page = 1
+        scraping_done = False
         
         if resume:
             # Try to resume from previous session
             logger.info("Attempting to resume from previous session...")
             progress_state = load_progress_state()
             
-            if progress_state:
+            if progress_state and is_checkpoint_stale(progress_state):
+                logger.warning(f"Checkpoint from {progress_state.get('timestamp')} is older than "
+                               f"{ScraperConfig.CHECKPOINT_TTL_HOURS}h and stale, starting fresh")
+                resume = False
+            elif progress_state:
                 session_id = progress_state.get("session_id")
                 resume_from_page = progress_state.get("last_completed_page", 1) + 1
                 
@@ -949,7 +1184,18 @@ Examples:
                 if fetch_history and history_temp_file and session_id in history_temp_file:
                     history = load_data_from_temp_file(history_temp_file, "history")
                 
-                logger.info(f"Resuming session {session_id} from page {resume_from_page}")
+                # Checkpoints append to .jsonl.gz files, so move data from an older .json array over first
+                if players_temp_file and players_temp_file.endswith('.json') and players:
+                    players_temp_file = save_data_to_temp_file(players, "players", session_id)
+                if history_temp_file and history_temp_file.endswith('.json') and history:
+                    history_temp_file = save_data_to_temp_file(history, "history", session_id)
+                
+                if progress_state.get("stage") == "upload" and players:
+                    # Every page was already scraped; only the upload is left to do
+                    scraping_done = True
+                    logger.info(f"Session {session_id} finished scraping, resuming at upload")
+                else:
+                    logger.info(f"Resuming session {session_id} from page {resume_from_page}")
                 logger.info(f"Already have {len(players)} players and {len(history)} history entries")
             else:
                 logger.warning("No previous session found to resume, starting fresh")
@@ -963,8 +1209,7 @@ Examples:
             if players_temp_file:
                 players = load_data_from_temp_file(players_temp_file, "players")
                 # Extract session_id from filename for resumable uploads
-                import re
-                match = re.search(r'ttcan_players_(\d{8}_\d{6})\.json', players_temp_file)
+                match = PLAYERS_FILE_PATTERN.search(players_temp_file)
                 if match:
                     session_id = match.group(1)
             
@@ -988,17 +1233,19 @@ Examples:
             if history:
                 history_temp_file = save_data_to_temp_file(history, "history", session_id)
         
-        elif resume:
+        elif resume and not scraping_done:
             # Continue scraping from where we left off
             logger.info(f"Continuing scraping from page {resume_from_page}...")
             try:
                 new_players, new_history = scrape_all_ttcan_players(
                     fetch_all_history=fetch_history, 
                     session_id=session_id, 
-                    resume_from_page=resume_from_page
+                    resume_from_page=resume_from_page,
+                    known_players=players,
+                    known_history_count=len(history)
                 )
                 
-                # Merge new data with existing data
+                # Merge new data with existing data; players repeated across the resume boundary were already skipped
                 players.extend(new_players)
                 history.extend(new_history)
                 